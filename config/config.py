@@ -7,12 +7,43 @@
 """
 
 import os
+import sys
+import threading
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent.parent
 
+# Config 读取的全部环境变量
+_ENV_KEYS = (
+    'OPENAI_API_KEY', 'OPENAI_API_BASE', 'OPENAI_API_VERSION', 'OLLAMA_BASE_URL',
+    'FINDPAPERS_IEEE_API_TOKEN', 'FINDPAPERS_SCOPUS_API_TOKEN', 'FINDPAPERS_PROXY',
+    'NCBI_API_KEY', 'NCBI_EMAIL', 'MIN_SJR_SCORE', 'SJR_DB_PATH', 'ENABLE_UNPAYWALL',
+    'INSTITUTIONAL_PROXY', 'INSTITUTION_USERNAME', 'INSTITUTION_PASSWORD',
+    'PAPER_SEARCH_DL_WORKERS', 'PAPER_SEARCH_DL_ASYNC',
+)
+
+# 已加载过的 .env 文件（绝对路径），每个进程只解析一次
+_DOTENV_LOADED = set()
+
+
+@lru_cache(maxsize=32)
+def _resolve_env_path(env_file: Optional[str]) -> Tuple[Path, str, bool]:
+    """
+    解析 .env 文件路径（每个 env_file 参数只解析、stat 一次）
+
+    返回:
+        (路径, 绝对路径字符串, 是否存在)
+    """
+    if env_file:
+        env_path = PROJECT_ROOT / env_file
+    else:
+        # 默认查找 .env 文件
+        env_path = PROJECT_ROOT / "config" / ".env"
+    return env_path, str(env_path.resolve()), env_path.exists()
+
 
 class Config:
     """配置类"""
@@ -25,16 +56,12 @@ class Config:
             env_file: .env 文件路径（相对于项目根目录）
         """
         # 尝试加载 .env 文件
-        if env_file:
-            env_path = PROJECT_ROOT / env_file
-        else:
-            # 默认查找 .env 文件
-            env_path = PROJECT_ROOT / "config" / ".env"
-
-        if env_path.exists():
+        env_path, env_key, env_exists = _resolve_env_path(env_file)
+        if env_exists and env_key not in _DOTENV_LOADED:
             try:
                 from dotenv import load_dotenv
-                load_dotenv(env_path)
+                load_dotenv(env_path, override=False)
+                _DOTENV_LOADED.add(env_key)
                 print(f"[OK] Loaded config file: {env_path}")
             except ImportError:
                 print(f"[INFO] Warning: python-dotenv not installed, cannot load .env file")
@@ -42,84 +69,130 @@ class Config:
             except Exception as e:
                 print(f"[INFO] Warning: Failed to load .env file: {e}")
 
-    @property
+        # 一次性快照环境变量，属性只读此字典
+        self._load_env()
+
+    def _load_env(self):
+        """快照环境变量并预先解析数值型配置"""
+        self._env = self._snapshot_env()
+        try:
+            self._min_sjr_score = float(self._env.get('MIN_SJR_SCORE') or 0)
+        except ValueError:
+            print(f"[INFO] Warning: Invalid MIN_SJR_SCORE '{self._env['MIN_SJR_SCORE']}', using 0")
+            self._min_sjr_score = 0.0
+
+    @staticmethod
+    def _snapshot_env() -> dict:
+        """读取 Config 关心的环境变量（仅包含已设置的键）"""
+        return {key: os.environ[key] for key in _ENV_KEYS if key in os.environ}
+
+    def invalidate(self, *names: str):
+        """
+        清除已缓存的配置项（环境变量变更后调用）
+
+        参数:
+            names: 要清除的属性名；为空时清除全部
+        """
+        if not names:
+            names = tuple(
+                name for name, value in vars(type(self)).items()
+                if isinstance(value, cached_property)
+            )
+        self._load_env()
+        for name in names:
+            self.__dict__.pop(name, None)
+
+    @cached_property
     def openai_api_key(self) -> Optional[str]:
         """OpenAI API Key（兼容多个提供商）"""
-        return os.getenv('OPENAI_API_KEY')
+        return self._env.get('OPENAI_API_KEY')
 
-    @property
+    @cached_property
     def openai_api_base(self) -> Optional[str]:
         """OpenAI API Base URL"""
-        return os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
+        return self._env.get('OPENAI_API_BASE', 'https://api.openai.com/v1')
 
-    @property
+    @cached_property
     def openai_api_version(self) -> Optional[str]:
         """Azure OpenAI API 版本"""
-        return os.getenv('OPENAI_API_VERSION')
+        return self._env.get('OPENAI_API_VERSION')
 
-    @property
+    @cached_property
     def ollama_base_url(self) -> Optional[str]:
         """Ollama 服务地址"""
-        return os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+        return self._env.get('OLLAMA_BASE_URL', 'http://localhost:11434')
 
-    @property
+    @cached_property
     def ieee_api_token(self) -> Optional[str]:
         """IEEE API Token"""
-        return os.getenv('FINDPAPERS_IEEE_API_TOKEN')
+        return self._env.get('FINDPAPERS_IEEE_API_TOKEN')
 
-    @property
+    @cached_property
     def scopus_api_token(self) -> Optional[str]:
         """Scopus API Token"""
-        return os.getenv('FINDPAPERS_SCOPUS_API_TOKEN')
+        return self._env.get('FINDPAPERS_SCOPUS_API_TOKEN')
 
-    @property
+    @cached_property
     def findpapers_proxy(self) -> Optional[str]:
         """findpapers 代理设置"""
-        return os.getenv('FINDPAPERS_PROXY')
+        return self._env.get('FINDPAPERS_PROXY')
 
     # ========== PubMed / NCBI 配置 ==========
-    @property
+    @cached_property
     def ncbi_api_key(self) -> Optional[str]:
         """NCBI API Key（可选，提高速率限制从 3 到 10 请求/秒）"""
-        return os.getenv('NCBI_API_KEY')
+        return self._env.get('NCBI_API_KEY')
 
-    @property
+    @cached_property
     def ncbi_email(self) -> Optional[str]:
         """NCBI 要求的邮箱地址"""
-        return os.getenv('NCBI_EMAIL', 'paper-search@example.com')
+        return self._env.get('NCBI_EMAIL', 'paper-search@example.com')
 
     # ========== 影响因子筛选配置 ==========
     @property
     def min_sjr_score(self) -> float:
         """最小 Scimago Journal Rank 分数（0 = 不筛选）"""
-        return float(os.getenv('MIN_SJR_SCORE', '0'))
+        return self._min_sjr_score
 
-    @property
+    @cached_property
     def sjr_db_path(self) -> str:
         """SJR 数据库路径"""
         default_path = PROJECT_ROOT / "cache" / "sjr_metrics.db"
-        return os.getenv('SJR_DB_PATH', str(default_path))
+        return self._env.get('SJR_DB_PATH', str(default_path))
 
     # ========== PDF 下载选项 ==========
-    @property
+    @cached_property
     def enable_unpaywall(self) -> bool:
         """启用 Unpaywall API（合法的开放获取定位器）"""
-        return os.getenv('ENABLE_UNPAYWALL', 'true').lower() == 'true'
+        return self._env.get('ENABLE_UNPAYWALL', 'true').lower() == 'true'
 
-    @property
+    @cached_property
     def institutional_proxy(self) -> Optional[str]:
         """机构 EZProxy URL（用于认证访问）"""
-        return os.getenv('INSTITUTIONAL_PROXY')
+        return self._env.get('INSTITUTIONAL_PROXY')
 
-    @property
+    @cached_property
     def institution_username(self) -> Optional[str]:
         """机构访问用户名"""
-        return os.getenv('INSTITUTION_USERNAME')
+        return self._env.get('INSTITUTION_USERNAME')
 
-    @property
+    @cached_property
     def institution_password(self) -> Optional[str]:
         """机构访问密码"""
-        return os.getenv('INSTITUTION_PASSWORD')
+        return self._env.get('INSTITUTION_PASSWORD')
+
+    @cached_property
+    def download_workers(self) -> int:
+        """同时下载的 PDF 数量（默认 8，无效值回退为 8）"""
+        try:
+            return max(1, int(self._env.get('PAPER_SEARCH_DL_WORKERS', '8')))
+        except ValueError:
+            return 8
+
+    @cached_property
+    def async_downloads(self) -> bool:
+        """arXiv PDF 是否使用 asyncio + aiohttp 下载（设为 0/false/no 则改用线程池）"""
+        return self._env.get('PAPER_SEARCH_DL_ASYNC', '1').lower() not in ('0', 'false', 'no')
 
     def get_llm_config(self, provider: str = 'auto') -> dict:
         """
@@ -132,12 +205,14 @@ class Config:
             配置字典
         """
         config = {}
+        api_key = self.openai_api_key
+        api_base = self.openai_api_base
 
         if provider == 'auto':
             # 自动检测可用的 LLM
-            if self.openai_api_key:
+            if api_key:
                 provider = 'openai'
-            elif self.openai_api_base and 'bigmodel' in self.openai_api_base:
+            elif api_base and 'bigmodel' in api_base:
                 provider = 'zhipu'
             else:
                 provider = 'ollama'
@@ -145,16 +220,16 @@ class Config:
         if provider == 'openai':
             config = {
                 'llm': 'gpt-3.5-turbo',  # 或 gpt-4
-                'api_key': self.openai_api_key,
+                'api_key': api_key,
             }
-            if self.openai_api_base:
-                config['api_base'] = self.openai_api_base
+            if api_base:
+                config['api_base'] = api_base
 
         elif provider == 'zhipu':
             config = {
                 'llm': 'glm-4',
-                'api_key': self.openai_api_key,
-                'api_base': self.openai_api_base or 'https://open.bigmodel.cn/api/paas/v4/',
+                'api_key': api_key,
+                'api_base': api_base or 'https://open.bigmodel.cn/api/paas/v4/',
             }
 
         elif provider == 'ollama':
@@ -171,67 +246,70 @@ class Config:
 
     def print_status(self):
         """打印配置状态"""
-        print("\n" + "="*60)
-        print("配置状态")
-        print("="*60)
+        lines = []
+        lines.append("\n" + "="*60)
+        lines.append("配置状态")
+        lines.append("="*60)
 
         # LLM 配置
-        print("\n【LLM 配置】")
+        lines.append("\n【LLM 配置】")
         if self.openai_api_key:
             api_base = self.openai_api_base or 'OpenAI'
-            print(f"  [OK] API Key: Configured (length: {len(self.openai_api_key)})")
-            print(f"  [OK] API Base: {api_base}")
+            lines.append(f"  [OK] API Key: Configured (length: {len(self.openai_api_key)})")
+            lines.append(f"  [OK] API Base: {api_base}")
         else:
-            print(f"  [X] API Key: Not configured")
+            lines.append(f"  [X] API Key: Not configured")
 
         if self.ollama_base_url:
-            print(f"  [OK] Ollama: {self.ollama_base_url}")
+            lines.append(f"  [OK] Ollama: {self.ollama_base_url}")
 
         # findpapers 配置
-        print("\n[findpapers Extended Databases]")
+        lines.append("\n[findpapers Extended Databases]")
         if self.ieee_api_token:
-            print(f"  [OK] IEEE API: Configured")
+            lines.append(f"  [OK] IEEE API: Configured")
         else:
-            print(f"  [X] IEEE API: Not configured (using free databases only)")
+            lines.append(f"  [X] IEEE API: Not configured (using free databases only)")
 
         if self.scopus_api_token:
-            print(f"  [OK] Scopus API: Configured")
+            lines.append(f"  [OK] Scopus API: Configured")
         else:
-            print(f"  [X] Scopus API: Not configured (using free databases only)")
+            lines.append(f"  [X] Scopus API: Not configured (using free databases only)")
 
         # 代理设置
         if self.findpapers_proxy:
-            print(f"\n[Proxy Settings]")
-            print(f"  [OK] Proxy: {self.findpapers_proxy}")
+            lines.append(f"\n[Proxy Settings]")
+            lines.append(f"  [OK] Proxy: {self.findpapers_proxy}")
 
         # PubMed 配置
-        print("\n[PubMed / NCBI Configuration]")
+        lines.append("\n[PubMed / NCBI Configuration]")
         if self.ncbi_email:
-            print(f"  [OK] NCBI Email: {self.ncbi_email}")
+            lines.append(f"  [OK] NCBI Email: {self.ncbi_email}")
         if self.ncbi_api_key:
-            print(f"  [OK] NCBI API Key: Configured")
+            lines.append(f"  [OK] NCBI API Key: Configured")
         else:
-            print(f"  [INFO] NCBI API Key: Not configured (using default rate limit)")
+            lines.append(f"  [INFO] NCBI API Key: Not configured (using default rate limit)")
 
         # 影响因子配置
-        print("\n[Impact Factor Filtering]")
+        lines.append("\n[Impact Factor Filtering]")
         if self.min_sjr_score > 0:
-            print(f"  [OK] Minimum SJR Score: {self.min_sjr_score}")
+            lines.append(f"  [OK] Minimum SJR Score: {self.min_sjr_score}")
         else:
-            print(f"  [X] SJR Filtering: Disabled")
+            lines.append(f"  [X] SJR Filtering: Disabled")
 
         # PDF 下载配置
-        print("\n[PDF Download Options]")
+        lines.append("\n[PDF Download Options]")
         if self.enable_unpaywall:
-            print(f"  [OK] Unpaywall API: Enabled")
+            lines.append(f"  [OK] Unpaywall API: Enabled")
         if self.institutional_proxy:
-            print(f"  [OK] Institutional Access: Configured")
+            lines.append(f"  [OK] Institutional Access: Configured")
 
-        print("\n" + "="*60)
+        lines.append("\n" + "="*60)
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 # 全局配置实例
 _config = None
+_config_lock = threading.Lock()
 
 
 def get_config(env_file: Optional[str] = None) -> Config:
@@ -245,8 +323,13 @@ def get_config(env_file: Optional[str] = None) -> Config:
         Config 实例
     """
     global _config
-    if _config is None:
-        _config = Config(env_file)
+    # 快速路径：已初始化时无需加锁
+    if _config is not None:
+        return _config
+
+    with _config_lock:
+        if _config is None:
+            _config = Config(env_file)
     return _config
 
 
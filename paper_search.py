@@ -13,39 +13,213 @@ Core functionality:
 
 import sys
 import os
+import time
+import re
 import json
+import hashlib
+import threading
+import asyncio
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
-# Ensure UTF-8 output on Windows
-if sys.platform == 'win32':
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+# Ensure UTF-8 output on Windows (reconfigure in place instead of re-wrapping)
+if sys.platform == 'win32' and hasattr(sys.stdout, 'reconfigure'):
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
 PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+# Paper fields consumed downstream; the rest of findpapers output is dropped
+_PAPER_FIELDS = frozenset({
+    'title', 'authors', 'abstract', 'publication', 'publication_date',
+    'databases', 'urls', 'doi', 'keywords'
+})
+
+# arXiv abs/pdf URL -> version-less ID (new-style 2402.12345 or old-style hep-th/9901001)
+_ARXIV_RE = re.compile(r'arxiv\.org/(?:abs|pdf)/([\w.\-]+?(?:/\d{7})?)(?:v\d+)?(?:\.pdf)?/?$')
+
+# results.json size above which papers are stream-parsed instead of loaded at once
+_STREAM_PARSE_MIN_BYTES = 32 * 1024 * 1024
+
+# Direct arXiv PDF endpoint
+_ARXIV_PDF_URL = "https://arxiv.org/pdf/{arxiv_id}.pdf"
+
+# Retry policy shared by the aiohttp and requests arXiv download paths
+_ARXIV_RETRIES = 3
+_ARXIV_BACKOFF = 0.5
+_ARXIV_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# arXiv asks automated clients to stay slow: at most 2 PDFs in flight and
+# 3 s between request starts (same delay the arxiv client used before)
+_ARXIV_MAX_CONNECTIONS = 2
+_ARXIV_MIN_INTERVAL = 3.0
+
+# unavailable_papers.md header and closing notes
+_UNAVAILABLE_HEADER = (
+    "# 无法下载的论文列表\n\n"
+    "**查询：** {query}\n"
+    "**生成时间：** {generated_at}\n"
+    "**总计：** {total} 篇\n"
+    "**已下载：** {downloaded} 篇\n"
+    "**无法下载：** {unavailable} 篇\n\n"
+    "---\n\n"
+)
+
+_UNAVAILABLE_TAIL = (
+    "\n## 说明\n\n"
+    "以下数据库的论文通常需要机构订阅才能下载全文：\n"
+    "- PubMed: 生物医学文献数据库\n"
+    "- medRxiv: 医学预印本\n"
+    "- ACM Digital Library: 计算机科学文献\n"
+    "- IEEE: 工程技术文献\n"
+    "- Scopus: 多学科文献数据库\n\n"
+    "建议：\n"
+    "1. 联系所在图书馆获取访问权限\n"
+    "2. 使用 Sci-Hub 等开放获取资源\n"
+    "3. 直接联系作者索取全文\n"
+)
+
+# User-Agent sent with arXiv PDF requests
+_USER_AGENT = "Paper-Search-Assistant/1.0"
+
+# PubMed / PDF / SJR modules are imported where used so each run only loads what it needs
+from config.config import get_config
+
 try:
-    from findpapers import search as findpapers_search
-    import arxiv
-except ImportError as e:
-    print(json.dumps({
-        "status": "error",
-        "error": f"Import failed: {e}",
-        "message": "Install dependencies: pip install findpapers arxiv"
-    }, ensure_ascii=False))
-    sys.exit(1)
-
-# Import new PubMed modules
-try:
-    from script.pubmed_searcher import PubMedSearcher
-    from script.pdf_downloader import PDFDownloadManager
-    from script.impact_filter import ImpactFactorFilter
-    from config.config import get_config
-except ImportError as e:
-    print(f"Warning: PubMed modules not available: {e}")
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _emit_json(data):
+    """Write data to stdout as indented JSON (orjson fast path when installed)"""
+    if orjson is not None:
+        payload = orjson.dumps(
+            data,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        )
+        buffer = getattr(sys.stdout, 'buffer', None)
+        if buffer is None:
+            # In-process capture (e.g. redirect_stdout to StringIO) has no byte layer
+            sys.stdout.write(payload.decode())
+            return
+        sys.stdout.flush()
+        buffer.write(payload)
+        buffer.flush()
+    else:
+        # Stream into stdout rather than building one large string
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+
+
+def _emit_jsonl(data):
+    """
+    Write data to stdout as JSON Lines: the summary (without papers) first,
+    then one compact line per paper, so consumers can process papers as they arrive
+    """
+    papers = data.get('papers', [])
+    summary = {k: v for k, v in data.items() if k != 'papers'}
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        buffer = getattr(sys.stdout, 'buffer', None)
+        if buffer is None:
+            # In-process capture (e.g. redirect_stdout to StringIO) has no byte layer
+            sys.stdout.write(orjson.dumps(summary, option=option).decode())
+            for paper in papers:
+                sys.stdout.write(orjson.dumps(paper, option=option).decode())
+            return
+        sys.stdout.flush()
+        buffer.write(orjson.dumps(summary, option=option))
+        for paper in papers:
+            buffer.write(orjson.dumps(paper, option=option))
+        buffer.flush()
+    else:
+        sys.stdout.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        for paper in papers:
+            sys.stdout.write(json.dumps(paper, ensure_ascii=False) + "\n")
+
+
+# Keys kept in each paper of the agent result
+_AGENT_PAPER_KEYS = frozenset({
+    'title', 'authors', 'year', 'abstract', 'database', 'urls', 'pdf_path', 'pdf_downloaded'
+})
+
+
+def _trim_agent_paper(p):
+    """Reshape a paper dict in place to the compact agent format"""
+    publication_date = p.get('publication_date') or ''
+    abstract = p.get('abstract') or ''
+    databases = p.get('databases')
+
+    p['title'] = p.get('title', '')
+    p['authors'] = p.get('authors', [])[:5]
+    p['year'] = publication_date[:4]
+    # Only mark truncation when the abstract was actually cut
+    p['abstract'] = abstract[:500] + '...' if len(abstract) > 500 else abstract
+    p['database'] = databases[0] if databases else 'Unknown'
+    p.setdefault('urls', [])
+    p.setdefault('pdf_path', None)
+    p.setdefault('pdf_downloaded', False)
+
+    for key in [k for k in p if k not in _AGENT_PAPER_KEYS]:
+        del p[key]
+
+
+def _join_limited(items, limit):
+    """Join the first `limit` items with ', ', adding '...' if truncated (no copy when short)"""
+    if len(items) <= limit:
+        return ', '.join(items)
+    return ', '.join(items[:limit]) + '...'
+
+
+class _RequestSpacer:
+    """Thread-safe minimum spacing between request starts"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserve the next start slot; returns the seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+            return start - now
+
+    def wait(self):
+        """Block until the next start slot"""
+        time.sleep(self.reserve())
+
+
+def _in_event_loop():
+    """True when called from inside a running asyncio loop (asyncio.run() would fail)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _use_async_downloads(enabled):
+    """
+    Whether arXiv PDFs use asyncio + aiohttp
+
+    Falls back to the thread pool automatically when aiohttp is missing or the
+    caller is already inside a running event loop; `enabled` (Config.async_downloads)
+    only forces threads.
+    """
+    if not enabled or _in_event_loop():
+        return False
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        return False
+    return True
 
 
 class PaperSearch:
@@ -53,7 +227,8 @@ class PaperSearch:
 
     def __init__(self, query, output_dir=None, limit=10, limit_per_database=None,
                  enable_pdf_download=True, export_unavailable=True,
-                 pubmed_mode=False, min_sjr=None, free_only=False, date_range=None):
+                 pubmed_mode=False, min_sjr=None, free_only=False, date_range=None,
+                 resume=False):
         """
         Initialize search
 
@@ -68,6 +243,7 @@ class PaperSearch:
             min_sjr: Minimum SJR score for impact factor filtering
             free_only: Only retrieve papers with free full text
             date_range: Optional (start_year, end_year) tuple
+            resume: Reuse results.json in output_dir if produced by the same search
         """
         self.query = query.strip()
         self.limit = limit
@@ -78,19 +254,26 @@ class PaperSearch:
         self.min_sjr = min_sjr
         self.free_only = free_only
         self.date_range = date_range
+        self.resume = resume
         self.results = None
+        self.downloaded_count = 0
+        self._papers_trimmed = False
+        self._result = None
 
         # Setup output directory
         if output_dir:
             self.output_dir = Path(output_dir)
         else:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.output_dir = PROJECT_ROOT / "papers" / f"search_{timestamp}"
+            # Microsecond hex token: sortable and collision-free for concurrent runs
+            token = format(time.time_ns() // 1000, 'x')
+            self.output_dir = PROJECT_ROOT / "papers" / f"search_{token}"
 
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Directories are created on first write (see _ensure_output_dir)
+        self._output_dir_ready = False
         self.json_file = self.output_dir / "results.json"
+        self.query_hash_file = self.output_dir / ".query_hash"
+        # Created on first download so --no-pdf runs leave no empty directory
         self.pdf_dir = self.output_dir / "pdfs"
-        self.pdf_dir.mkdir(exist_ok=True)
         self.unavailable_file = self.output_dir / "unavailable_papers.md"
 
         # Load configuration
@@ -98,10 +281,13 @@ class PaperSearch:
 
     def search(self):
         """Search papers using findpapers or PubMed mode"""
+        self._result = None
+        self._papers_trimmed = False
         try:
             if self.pubmed_mode:
                 # Use specialized PubMed searcher
                 print("使用 PubMed 搜索模式...")
+                from script.pubmed_searcher import PubMedSearcher
 
                 searcher = PubMedSearcher(
                     email=self.config.ncbi_email,
@@ -126,16 +312,35 @@ class PaperSearch:
                     self._filter_by_impact_factor()
 
             else:
-                # Use existing findpapers search
+                query_hash = self._query_hash()
+
+                # Resume: skip findpapers when results.json came from the same search
+                if self.resume and self.json_file.exists() and self._stored_query_hash() == query_hash:
+                    print(f"Resuming from existing results: {self.json_file}")
+                    self.results = self._load_results()
+                    return True
+
+                # Use existing findpapers search (imported lazily: heavy dependency)
+                try:
+                    from findpapers import search as findpapers_search
+                except ImportError as e:
+                    self.results = {
+                        "status": "error",
+                        "error": f"Import failed: {e}",
+                        "message": "Install dependencies: pip install findpapers"
+                    }
+                    return False
+
+                self._ensure_output_dir()
                 findpapers_search(
                     query=self.query,
                     outputpath=str(self.json_file),
                     limit=self.limit,
                     limit_per_database=self.limit_per_database,
                 )
+                self.query_hash_file.write_text(query_hash, encoding='utf-8')
 
-                with open(self.json_file, 'r', encoding='utf-8') as f:
-                    self.results = json.load(f)
+                self.results = self._load_results()
 
             return True
 
@@ -146,48 +351,99 @@ class PaperSearch:
             }
             return False
 
+    def _ensure_output_dir(self, subdir=None):
+        """Create output_dir (and optionally a subdirectory) once, right before the first write"""
+        if not self._output_dir_ready:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self._output_dir_ready = True
+        if subdir is not None:
+            subdir.mkdir(exist_ok=True)
+
+    def _query_hash(self):
+        """Hash of the findpapers search parameters, used to validate resume"""
+        key = f"{self.query}\x00{self.limit}\x00{self.limit_per_database}"
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+
+    def _stored_query_hash(self):
+        """Query hash written by a previous run, or None"""
+        try:
+            return self.query_hash_file.read_text(encoding='utf-8').strip()
+        except OSError:
+            return None
+
+    def _load_results(self):
+        """
+        Load findpapers results.json
+
+        orjson parses whole files fastest; ijson streams papers one at a time
+        and is used instead for large files (or when orjson is missing).
+        """
+        ijson = None
+        if orjson is None or self.json_file.stat().st_size > _STREAM_PARSE_MIN_BYTES:
+            try:
+                import ijson
+            except ImportError:
+                pass
+
+        if ijson is None:
+            # findpapers only persists to disk, so parse the bytes it wrote
+            if orjson is not None:
+                return orjson.loads(self.json_file.read_bytes())
+            with open(self.json_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        # Keep only the fields used by filtering, download, export and output
+        papers = []
+        by_database = {}
+        with open(self.json_file, 'rb') as f:
+            for paper in ijson.items(f, 'papers.item', use_float=True):
+                papers.append({k: v for k, v in paper.items() if k in _PAPER_FIELDS})
+                for db in paper.get('databases') or []:
+                    by_database[db] = by_database.get(db, 0) + 1
+
+        return {
+            'papers': papers,
+            'number_of_papers': len(papers),
+            'number_of_papers_by_database': by_database
+        }
+
     def _filter_by_impact_factor(self):
         """Filter papers by minimum SJR score"""
         if not self.results or 'papers' not in self.results:
             return
 
         try:
-            filter_engine = ImpactFactorFilter()
-
-            # 检查数据库是否为空
-            import sqlite3
-            conn = sqlite3.connect(filter_engine.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM journals')
-            count = cursor.fetchone()[0]
-            conn.close()
-
-            if count == 0:
-                print("\n⚠ SJR 数据库为空，无法进行影响因子筛选")
-                print("\n💡 快速设置:")
-                print("  运行: python script/setup_sjr.py")
-                print("  或查看: PUBMED_GUIDE.md 中的 'SJR 数据设置' 章节")
-                print("\n继续搜索（不进行影响因子筛选）...\n")
-                return
-
-            papers = self.results.get('papers', [])
-
-            filtered = filter_engine.filter_papers_by_sjr(
-                papers=papers,
-                min_sjr=self.min_sjr
-            )
+            from script.impact_filter import ImpactFactorFilter
+
+            # Close the SQLite connection as soon as filtering is done
+            with ImpactFactorFilter() as filter_engine:
+                # 检查数据库是否为空
+                if filter_engine.is_empty():
+                    print("\n⚠ SJR 数据库为空，无法进行影响因子筛选")
+                    print("\n💡 快速设置:")
+                    print("  运行: python script/setup_sjr.py")
+                    print("  或查看: PUBMED_GUIDE.md 中的 'SJR 数据设置' 章节")
+                    print("\n继续搜索（不进行影响因子筛选）...\n")
+                    return
+
+                papers = self.results.get('papers', [])
+
+                filtered = filter_engine.filter_papers_by_sjr(
+                    papers=papers,
+                    min_sjr=self.min_sjr
+                )
 
-            self.results['papers'] = filtered
-            self.results['number_of_papers'] = len(filtered)
+                self.results['papers'] = filtered
+                self.results['number_of_papers'] = len(filtered)
 
-            # Print summary
-            summary = filter_engine.get_sjr_summary(filtered)
-            if summary['count'] > 0:
-                print(f"\n✓ SJR 筛选完成 (最小: {self.min_sjr}):")
-                print(f"  平均: {summary['mean']:.2f}")
-                print(f"  中位数: {summary['median']:.2f}")
-                print(f"  最高: {summary['max']:.2f}")
-                print(f"  最低: {summary['min']:.2f}")
+                # Print summary (accumulated during filtering)
+                summary = filter_engine.last_summary
+                if summary['count'] > 0:
+                    print(f"\n✓ SJR 筛选完成 (最小: {self.min_sjr}):")
+                    print(f"  平均: {summary['mean']:.2f}")
+                    print(f"  中位数: {summary['median']:.2f}")
+                    print(f"  最高: {summary['max']:.2f}")
+                    print(f"  最低: {summary['min']:.2f}")
 
         except Exception as e:
             print(f"\n⚠ 影响因子过滤失败: {e}")
@@ -205,7 +461,18 @@ class PaperSearch:
         if self.pubmed_mode:
             # Use enhanced PDF downloader
             print("\n下载 PDFs...")
-            downloader = PDFDownloadManager(output_dir=self.pdf_dir)
+            try:
+                from script.pdf_downloader import PDFDownloadManager, log_to_console
+            except ImportError as e:
+                print(f"Warning: PubMed PDF download unavailable: {e}")
+                for paper in papers:
+                    paper['pdf_downloaded'] = False
+                return 0
+
+            downloader = PDFDownloadManager(
+                output_dir=self.pdf_dir,
+                ncbi_api_key=self.config.ncbi_api_key
+            )
 
             # Prepare institution credentials if configured
             institution_credentials = None
@@ -216,53 +483,203 @@ class PaperSearch:
                     'password': self.config.institution_password
                 }
 
-            for idx, paper in enumerate(papers, 1):
-                print(f"  [{idx}/{len(papers)}] {paper.get('title', 'N/A')[:60]}...")
+            # Download PDFs concurrently (I/O bound); results are applied on this thread.
+            # Per-source success lines from the workers go through one log thread to stderr.
+            with log_to_console(), ThreadPoolExecutor(max_workers=self.config.download_workers) as executor:
+                futures = {
+                    executor.submit(
+                        downloader.download_paper_pdf,
+                        paper=paper,
+                        pmid=paper.get('pmid', ''),
+                        doi=paper.get('doi', ''),
+                        institution_credentials=institution_credentials,
+                        pmcid=paper.get('pmcid')
+                    ): paper
+                    for paper in papers
+                }
 
-                result = downloader.download_paper_pdf(
-                    paper=paper,
-                    pmid=paper.get('pmid', ''),
-                    doi=paper.get('doi', ''),
-                    institution_credentials=institution_credentials
-                )
+                for idx, future in enumerate(as_completed(futures), 1):
+                    paper = futures[future]
+                    print(f"  [{idx}/{len(papers)}] {paper.get('title', 'N/A')[:60]}...")
 
-                if result['success']:
-                    paper['pdf_path'] = result['path']
-                    paper['pdf_downloaded'] = True
-                    paper['pdf_source'] = result['source']
-                    downloaded += 1
-                else:
-                    paper['pdf_downloaded'] = False
-                    paper['pdf_error'] = result.get('error', 'Unknown error')
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {'success': False, 'error': str(e)}
+
+                    if result['success']:
+                        paper['pdf_path'] = result['path']
+                        paper['pdf_downloaded'] = True
+                        paper['pdf_source'] = result['source']
+                        downloaded += 1
+                    else:
+                        paper['pdf_downloaded'] = False
+                        paper['pdf_error'] = result.get('error', 'Unknown error')
 
             print(f"\n✓ 下载完成: {downloaded}/{len(papers)} 篇")
         else:
-            # Use existing arXiv download logic
+            # Collect arXiv IDs first so each PDF is fetched at most once, even when
+            # the same paper was returned by several databases
+            id_to_papers = {}
             for paper in papers:
-                # Try arXiv URLs
+                paper['pdf_downloaded'] = False
                 for url in paper.get('urls', []):
-                    if 'arxiv.org' in url:
-                        arxiv_id = url.split('/')[-1]
-                        try:
-                            search = arxiv.Search(id_list=[arxiv_id])
-                            for result in search.results():
-                                pdf_path = self.pdf_dir / f"{arxiv_id}.pdf"
-                                result.download_pdf(filename=str(pdf_path))
-
-                                # Add PDF path to paper data
-                                paper['pdf_path'] = str(pdf_path)
-                                paper['pdf_downloaded'] = True
-                                downloaded += 1
-                                break
-                        except Exception:
-                            paper['pdf_downloaded'] = False
+                    match = _ARXIV_RE.search(url)
+                    if match:
+                        arxiv_id = match.group(1)
+                        pdf_path = self._arxiv_pdf_path(arxiv_id)
+
+                        # Skip PDFs already fetched by a previous run
+                        if pdf_path.exists() and pdf_path.stat().st_size > 0:
+                            downloaded += self._mark_arxiv_downloaded([paper], pdf_path)
+                        else:
+                            id_to_papers.setdefault(arxiv_id, []).append(paper)
                         break
-                else:
-                    # No arXiv URL found, mark as not downloaded
-                    paper['pdf_downloaded'] = False
+
+            if not id_to_papers:
+                return downloaded
+
+            self._ensure_output_dir(self.pdf_dir)
+
+            # PDFs are fetched straight from arxiv.org/pdf/{id} (no metadata lookup):
+            # asyncio + aiohttp when installed and no event loop is running, otherwise
+            # requests in a thread pool
+            if _use_async_downloads(self.config.async_downloads):
+                downloaded += asyncio.run(self._download_arxiv_async(id_to_papers))
+            else:
+                downloaded += self._download_arxiv_threaded(id_to_papers)
+
+        return downloaded
+
+    async def _download_arxiv_async(self, id_to_papers):
+        """Download arXiv PDFs with aiohttp, bounded and paced for arxiv.org"""
+        import aiohttp
+
+        semaphore = asyncio.Semaphore(_ARXIV_MAX_CONNECTIONS)
+        spacer = _RequestSpacer(_ARXIV_MIN_INTERVAL)
+        timeout = aiohttp.ClientTimeout(total=120)
+        headers = {'User-Agent': _USER_AGENT}
+
+        async def fetch(session, arxiv_id, papers):
+            pdf_path = self._arxiv_pdf_path(arxiv_id)
+            part_path = pdf_path.with_name(pdf_path.name + '.part')
+            url = _ARXIV_PDF_URL.format(arxiv_id=arxiv_id)
+            async with semaphore:
+                # Same policy as the threaded path: up to 3 retries with backoff on
+                # connection errors and 429/5xx responses
+                for attempt in range(_ARXIV_RETRIES + 1):
+                    await asyncio.sleep(spacer.reserve())
+                    try:
+                        async with session.get(url) as response:
+                            if response.status in _ARXIV_RETRY_STATUSES and attempt < _ARXIV_RETRIES:
+                                raise aiohttp.ClientResponseError(
+                                    response.request_info, response.history, status=response.status
+                                )
+                            response.raise_for_status()
+                            with open(part_path, 'wb') as f:
+                                async for chunk in response.content.iter_chunked(65536):
+                                    f.write(chunk)
+                        os.replace(part_path, pdf_path)
+                        break
+                    except Exception as e:
+                        if part_path.exists():
+                            part_path.unlink()
+                        retryable = (
+                            isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+                            or getattr(e, 'status', None) in _ARXIV_RETRY_STATUSES
+                        )
+                        if not retryable or attempt == _ARXIV_RETRIES:
+                            return 0
+                        await asyncio.sleep(_ARXIV_BACKOFF * (2 ** attempt))
+
+            return self._mark_arxiv_downloaded(papers, pdf_path)
+
+        connector = aiohttp.TCPConnector(limit=_ARXIV_MAX_CONNECTIONS)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            results = await asyncio.gather(
+                *(fetch(session, arxiv_id, papers) for arxiv_id, papers in id_to_papers.items())
+            )
+        return sum(results)
+
+    def _download_arxiv_threaded(self, id_to_papers):
+        """Download arXiv PDFs directly from arxiv.org with a small, paced thread pool"""
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+        except ImportError as e:
+            print(f"Warning: arXiv download unavailable: {e}")
+            print("  Install: pip install requests (or aiohttp)")
+            return 0
+
+        workers = _ARXIV_MAX_CONNECTIONS
+        spacer = _RequestSpacer(_ARXIV_MIN_INTERVAL)
+        downloaded = 0
+
+        # One pooled session (sized to the worker count) so TLS connections are reused
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=workers) as executor:
+            session.headers['User-Agent'] = _USER_AGENT
+            session.mount('https://', HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=workers,
+                max_retries=Retry(total=_ARXIV_RETRIES, backoff_factor=_ARXIV_BACKOFF,
+                                  status_forcelist=_ARXIV_RETRY_STATUSES)
+            ))
+
+            futures = {}
+            for arxiv_id, papers in id_to_papers.items():
+                pdf_path = self._arxiv_pdf_path(arxiv_id)
+                future = executor.submit(self._fetch_arxiv_pdf, session, arxiv_id, pdf_path, spacer)
+                futures[future] = (papers, pdf_path)
+
+            for future in as_completed(futures):
+                papers, pdf_path = futures[future]
+                try:
+                    future.result()
+                except Exception:
+                    continue
+
+                downloaded += self._mark_arxiv_downloaded(papers, pdf_path)
 
         return downloaded
 
+    def _arxiv_pdf_path(self, arxiv_id):
+        """Local PDF path for a version-less arXiv ID"""
+        return self.pdf_dir / f"{arxiv_id.replace('/', '_')}.pdf"
+
+    @staticmethod
+    def _mark_arxiv_downloaded(papers, pdf_path):
+        """Add PDF path to paper data; returns the number of papers marked"""
+        for paper in papers:
+            paper['pdf_path'] = str(pdf_path)
+            paper['pdf_downloaded'] = True
+        return len(papers)
+
+    @staticmethod
+    def _fetch_arxiv_pdf(http, arxiv_id, pdf_path, spacer=None):
+        """
+        Download an arXiv PDF via a temporary file so partial downloads are never reused
+
+        Args:
+            http: requests Session used for the GET
+            arxiv_id: Version-less arXiv ID
+            pdf_path: Destination path
+            spacer: Optional _RequestSpacer pacing requests to arxiv.org
+        """
+        part_path = pdf_path.with_name(pdf_path.name + '.part')
+        if spacer is not None:
+            spacer.wait()
+        try:
+            with http.get(_ARXIV_PDF_URL.format(arxiv_id=arxiv_id), stream=True, timeout=30) as response:
+                response.raise_for_status()
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        f.write(chunk)
+            os.replace(part_path, pdf_path)
+        finally:
+            if part_path.exists():
+                part_path.unlink()
+
     def _export_unavailable_papers(self):
         """Export list of papers that couldn't be downloaded"""
         if not self.results or 'papers' not in self.results:
@@ -274,46 +691,49 @@ class PaperSearch:
         if not unavailable:
             return 0
 
+        generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
         # Create markdown file
-        content = f"# 无法下载的论文列表\n\n"
-        content += f"**查询：** {self.query}\n"
-        content += f"**生成时间：** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        content += f"**总计：** {len(papers)} 篇\n"
-        content += f"**已下载：** {len(papers) - len(unavailable)} 篇\n"
-        content += f"**无法下载：** {len(unavailable)} 篇\n\n"
-        content += "---\n\n"
+        parts = [_UNAVAILABLE_HEADER.format(
+            query=self.query,
+            generated_at=generated_at,
+            total=len(papers),
+            downloaded=len(papers) - len(unavailable),
+            unavailable=len(unavailable)
+        )]
 
         for idx, paper in enumerate(unavailable, 1):
-            content += f"## {idx}. {paper.get('title', 'N/A')}\n\n"
+            parts.append(f"## {idx}. {paper.get('title', 'N/A')}\n\n")
 
             # Basic info
-            content += f"- **年份：** {paper.get('publication_date', '')[:4] if paper.get('publication_date') else 'N/A'}\n"
-            content += f"- **数据库：** {', '.join(paper.get('databases', ['N/A']))}\n"
+            year = (paper.get('publication_date') or '')[:4] or 'N/A'
+            parts.append(f"- **年份：** {year}\n")
+            parts.append(f"- **数据库：** {', '.join(paper.get('databases', ['N/A']))}\n")
 
             # Authors
             authors = paper.get('authors', [])
             if authors:
-                content += f"- **作者：** {', '.join(authors[:10])}" + ("..." if len(authors) > 10 else "") + "\n"
+                parts.append(f"- **作者：** {_join_limited(authors, 10)}\n")
 
             # Keywords
             keywords = paper.get('keywords', [])
             if keywords:
-                content += f"- **关键词：** {', '.join(keywords[:15])}" + ("..." if len(keywords) > 15 else "") + "\n"
+                parts.append(f"- **关键词：** {_join_limited(keywords, 15)}\n")
 
             # Impact factor (期刊信息)
             publication = paper.get('publication', {})
             if publication:
-                content += f"- **期刊/会议：** {publication.get('title', 'N/A')}\n"
-                content += f"- **类型：** {publication.get('category', 'N/A')}\n"
+                parts.append(f"- **期刊/会议：** {publication.get('title', 'N/A')}\n")
+                parts.append(f"- **类型：** {publication.get('category', 'N/A')}\n")
 
             # URLs
             urls = paper.get('urls', [])
             if urls:
-                content += f"- **链接：**\n"
-                for url in urls[:5]:  # Limit to 5 URLs
-                    content += f"  - {url}\n"
+                parts.append(f"- **链接：**\n")
+                for url in urls if len(urls) <= 5 else urls[:5]:  # Limit to 5 URLs
+                    parts.append(f"  - {url}\n")
                 if len(urls) > 5:
-                    content += f"  - ... (共 {len(urls)} 个链接)\n"
+                    parts.append(f"  - ... (共 {len(urls)} 个链接)\n")
 
             # Abstract/Summary
             abstract = paper.get('abstract', '')
@@ -321,31 +741,22 @@ class PaperSearch:
                 # Limit abstract length
                 if len(abstract) > 800:
                     abstract = abstract[:800] + "..."
-                content += f"\n**摘要：**\n{abstract}\n"
+                parts.append(f"\n**摘要：**\n{abstract}\n")
 
             # DOI
             doi = paper.get('doi', '')
             if doi:
-                content += f"\n- **DOI：** {doi}\n"
+                parts.append(f"\n- **DOI：** {doi}\n")
 
-            content += "\n---\n\n"
+            parts.append("\n---\n\n")
 
         # Add summary at the end
-        content += "\n## 说明\n\n"
-        content += "以下数据库的论文通常需要机构订阅才能下载全文：\n"
-        content += "- PubMed: 生物医学文献数据库\n"
-        content += "- medRxiv: 医学预印本\n"
-        content += "- ACM Digital Library: 计算机科学文献\n"
-        content += "- IEEE: 工程技术文献\n"
-        content += "- Scopus: 多学科文献数据库\n\n"
-        content += "建议：\n"
-        content += "1. 联系所在图书馆获取访问权限\n"
-        content += "2. 使用 Sci-Hub 等开放获取资源\n"
-        content += "3. 直接联系作者索取全文\n"
-
-        # Write to file
-        with open(self.unavailable_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        parts.append(_UNAVAILABLE_TAIL)
+
+        # Write to file: the document is already fully built, so encode it once and
+        # hand it to the OS in a single write instead of going through TextIOWrapper
+        self._ensure_output_dir()
+        self.unavailable_file.write_bytes(''.join(parts).encode('utf-8'))
 
         return len(unavailable)
 
@@ -357,39 +768,42 @@ class PaperSearch:
                 "error": "No results"
             }
 
+        # Search failures (including missing dependencies) are reported as-is
+        if self.results.get('status') == 'error':
+            return self.results
+
+        # Built once per search; repeated calls (e.g. agent wrappers logging) reuse it
+        if self._result is not None:
+            return self._result
+
         papers = self.results.get('papers', [])
         total = len(papers)
 
-        return {
+        # Trim paper dicts in place to the agent fields
+        if not self._papers_trimmed:
+            for p in papers:
+                _trim_agent_paper(p)
+            self._papers_trimmed = True
+
+        self._result = {
             "status": "success",
             "query": self.query,
             "total": total,
             "output_dir": str(self.output_dir),
             "json_file": str(self.json_file),
             "pdf_dir": str(self.pdf_dir),
-            "pdfs_downloaded": sum(1 for p in papers if p.get('pdf_downloaded')),
+            "pdfs_downloaded": self.downloaded_count,
             "by_database": self.results.get('number_of_papers_by_database', {}),
-            "papers": [
-                {
-                    "title": p.get('title', ''),
-                    "authors": p.get('authors', [])[:5],
-                    "year": p.get('publication_date', '')[:4] if p.get('publication_date') else '',
-                    "abstract": p.get('abstract', '')[:500] + '...' if p.get('abstract') else '',
-                    "database": p.get('databases', ['Unknown'])[0] if p.get('databases') else 'Unknown',
-                    "urls": p.get('urls', []),
-                    "pdf_path": p.get('pdf_path', None),
-                    "pdf_downloaded": p.get('pdf_downloaded', False)
-                }
-                for p in papers
-            ]
+            "papers": papers
         }
+        return self._result
 
     def run(self):
         """Execute full search pipeline"""
         success = self.search()
 
         if success and self.enable_pdf_download:
-            self._download_pdfs()
+            self.downloaded_count = self._download_pdfs()
 
         if self.export_unavailable:
             unavailable_count = self._export_unavailable_papers()
@@ -413,6 +827,10 @@ def main():
     parser.add_argument('--no-pdf', action='store_true', help='Skip PDF download')
     parser.add_argument('--no-export-unavailable', action='store_true', help='Skip exporting unavailable papers list')
     parser.add_argument('--json', action='store_true', help='Output JSON to stdout')
+    parser.add_argument('--jsonl', action='store_true',
+                       help='Output JSON Lines to stdout: summary line, then one line per paper')
+    parser.add_argument('--resume', action='store_true',
+                       help='Reuse results.json in --output if it was produced by the same search')
 
     # PubMed mode options
     parser.add_argument('--pubmed-mode', action='store_true',
@@ -445,16 +863,23 @@ def main():
         pubmed_mode=getattr(args, 'pubmed_mode', False),
         min_sjr=getattr(args, 'min_sjr', None),
         free_only=getattr(args, 'free_only', False),
-        date_range=date_range
+        date_range=date_range,
+        resume=args.resume
     )
 
     result = searcher.run()
 
     # Output
-    if args.json:
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.jsonl:
+        _emit_jsonl(result)
+    elif args.json:
+        _emit_json(result)
     else:
         print(f"Status: {result['status']}")
+        if result.get('error'):
+            print(f"Error: {result['error']}")
+            if result.get('message'):
+                print(result['message'])
         print(f"Total papers: {result.get('total', 0)}")
         print(f"Output: {result.get('output_dir', 'N/A')}")
         if result.get('by_database'):
@@ -7,8 +7,43 @@ Scimago Journal Rank (SJR) 影响因子过滤器
 
 import sqlite3
 import csv
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
+
+
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+# 查询连接的 mmap 大小（256 MiB）与页缓存（64 MiB，负值单位为 KiB）
+_MMAP_SIZE = 256 * 1024 * 1024
+_CACHE_SIZE = -65536
+
+_INSERT_JOURNAL_SQL = '''
+    INSERT OR REPLACE INTO journals
+    (issn, eissn, title, sjr, sjr_best_quartile,
+     h_index, total_docs, country, areas, categories, year,
+     title_norm)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# SJR CSV 中用到的列（按插入顺序）
+_SJR_CSV_COLUMNS = [
+    'Issn', 'Eissn', 'Title', 'SJR', 'SJR Best Quartile', 'H index',
+    'Total Docs. (2024)', 'Country', 'Areas', 'Categories'
+]
+
+
+def _norm(s: str) -> str:
+    """规范化期刊标题：小写、去标点、合并空白"""
+    return _NON_WORD_RE.sub(' ', s.lower()).strip() if s else ''
+
+
+def _split_issns(s: str) -> List[str]:
+    """拆分逗号分隔的 ISSN 字段，并统一为去掉连字符的大写形式"""
+    if not s:
+        return []
+    return [part for part in (p.replace('-', '').strip().upper() for p in s.split(',')) if part]
 
 
 class ImpactFactorFilter:
@@ -29,12 +64,57 @@ class ImpactFactorFilter:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
+        # 所有操作复用同一个长连接（自动提交模式，导入时显式开启事务）
+        self._conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None
+        )
+
+        # 查找表在首次查询时加载
+        self._issn_idx = None
+        self._title_idx = None
+
+        # 同一 (期刊名, ISSN) 的重复查询直接命中 LRU 缓存
+        # （缓存持有 self 形成引用环，用完请调用 close() 或使用 with 语句）
+        self._lookup_cache = lru_cache(maxsize=10000)(self._resolve_journal)
+
+        # 最近一次 filter_papers_by_sjr 结果的 SJR 统计摘要
+        self.last_summary = None
+
         # 初始化数据库
         self._init_database()
 
+    def get_conn(self) -> sqlite3.Connection:
+        """
+        获取过滤器共享的数据库连接（已启用 WAL 与 mmap）
+
+        调用方不应关闭该连接，使用完过滤器后调用 close()
+        """
+        return self._conn
+
+    def close(self):
+        """关闭数据库连接并释放查询缓存"""
+        conn = getattr(self, '_conn', None)
+        if conn is not None:
+            conn.close()
+            self._conn = None
+
+        # 缓存包装的是绑定方法（引用 self），删除它以解除引用环
+        self.__dict__.pop('_lookup_cache', None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
     def _init_database(self):
         """创建 SQLite 数据库"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
         cursor = conn.cursor()
 
         # 创建期刊表
@@ -50,23 +130,68 @@ class ImpactFactorFilter:
                 country TEXT,
                 areas TEXT,
                 categories TEXT,
-                year INTEGER
+                year INTEGER,
+                title_norm TEXT
             )
         ''')
 
+        # 旧版数据库没有 title_norm 列：补列并回填
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(journals)')}
+        if 'title_norm' not in columns:
+            cursor.execute('ALTER TABLE journals ADD COLUMN title_norm TEXT')
+            conn.create_function('norm_title', 1, _norm, deterministic=True)
+            cursor.execute('UPDATE journals SET title_norm = norm_title(title)')
+
         # 创建索引
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_title
             ON journals(title)
         ''')
 
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_title_norm
+            ON journals(title_norm)
+        ''')
+
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_sjr
             ON journals(sjr DESC)
         ''')
 
-        conn.commit()
-        conn.close()
+        # 标题全文索引（外部内容表，导入后整体重建）
+        # 部分 SQLite 构建没有 FTS5，此时仅使用精确匹配
+        try:
+            exists = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'journals_fts'"
+            ).fetchone()
+            if not exists:
+                cursor.execute('''
+                    CREATE VIRTUAL TABLE journals_fts
+                    USING fts5(title, content='journals', content_rowid='rowid')
+                ''')
+                cursor.execute("INSERT INTO journals_fts(journals_fts) VALUES('rebuild')")
+            self._fts = True
+        except sqlite3.OperationalError:
+            self._fts = False
+
+        # 查询以读为主：WAL 允许导入期间并发读取，mmap 直接从页缓存读页
+        # （Windows 上 mmap 收益较小，但无副作用）
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA mmap_size={_MMAP_SIZE}')
+        cursor.execute(f'PRAGMA cache_size={_CACHE_SIZE}')
+
+    def is_empty(self) -> bool:
+        """
+        检查数据库中是否没有期刊数据
+
+        Returns:
+            True 如果 journals 表为空
+        """
+        # 只探测一行，避免 COUNT(*) 全表扫描
+        result = self._conn.execute('SELECT 1 FROM journals LIMIT 1').fetchone()
+
+        return result is None
 
     def import_sjr_csv(self, csv_path: Path, year: int = 2024):
         """
@@ -76,108 +201,252 @@ class ImpactFactorFilter:
             csv_path: SJR CSV 文件路径
             year: 数据年份
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
+
+        # 批量导入调优：数据可从 CSV 重建，因此允许关闭同步刷盘
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-200000')
         cursor = conn.cursor()
 
-        imported = 0
-        skipped = 0
+        counts = {'imported': 0, 'skipped': 0}
+
+        def parsed_rows(reader):
+            for row in reader:
+                values = self._parse_sjr_row(row, year)
+                if values is None:
+                    counts['skipped'] += 1
+                    continue
+                counts['imported'] += 1
+                yield values
 
         try:
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                # Use semicolon delimiter for SJR CSV files
-                reader = csv.DictReader(f, delimiter=';')
-
-                for row in reader:
-                    try:
-                        # Map CSV columns to database fields
-                        issn = row.get('Issn', '') or ''
-                        eissn = row.get('Eissn', '') or ''
-                        title = row.get('Title', '') or ''
-                        sjr_str = row.get('SJR', '') or '0'
-                        sjr_quartile = row.get('SJR Best Quartile', '') or ''
-                        h_index_str = row.get('H index', '') or '0'
-                        total_docs_str = row.get('Total Docs. (2024)', '') or '0'
-                        country = row.get('Country', '') or ''
-                        areas = row.get('Areas', '') or ''
-                        categories = row.get('Categories', '') or ''
-
-                        # Clean SJR value (remove commas, convert to float)
-                        sjr = float(sjr_str.replace(',', '').strip()) if sjr_str.strip() else 0.0
-
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO journals
-                            (issn, eissn, title, sjr, sjr_best_quartile,
-                             h_index, total_docs, country, areas, categories, year)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            issn,
-                            eissn,
-                            title,
-                            sjr,
-                            sjr_quartile,
-                            int(h_index_str) if h_index_str.isdigit() else 0,
-                            int(total_docs_str.replace(',', '').strip()) if total_docs_str.strip() else 0,
-                            country,
-                            areas,
-                            categories,
-                            year
-                        ))
-                        imported += 1
-                    except Exception as e:
-                        skipped += 1
-                        continue
+            # 所有插入放在一个显式事务中，只在结束时提交一次
+            conn.execute('BEGIN IMMEDIATE')
+
+            try:
+                import pandas as pd
+            except ImportError:
+                pd = None
+
+            if pd is not None:
+                # 有 pandas 时按列解析，避免逐行的 Python 字符串处理
+                rows, counts['skipped'] = self._parse_sjr_frame(pd, csv_path, year)
+                counts['imported'] = len(rows)
+                cursor.executemany(_INSERT_JOURNAL_SQL, rows)
+            else:
+                with open(csv_path, 'r', encoding='utf-8', buffering=1 << 20) as f:
+                    # Use semicolon delimiter for SJR CSV files
+                    reader = csv.DictReader(f, delimiter=';')
+
+                    # 单条预编译语句 + 生成器，绑定在 C 层完成
+                    cursor.executemany(_INSERT_JOURNAL_SQL, parsed_rows(reader))
+
+            if self._fts:
+                conn.execute("INSERT INTO journals_fts(journals_fts) VALUES('rebuild')")
 
             conn.commit()
+
+            # 数据已变化，下次查询时重新加载查找表
+            self._issn_idx = None
+            self._title_idx = None
+            self._lookup_cache.cache_clear()
+
             print(f"[OK] Imported SJR data ({year}):")
-            print(f"  Success: {imported} journals")
-            print(f"  Skipped: {skipped} rows")
+            print(f"  Success: {counts['imported']} journals")
+            print(f"  Skipped: {counts['skipped']} rows")
 
         except Exception as e:
+            conn.rollback()
             print(f"[ERROR] Import failed: {e}")
         finally:
-            conn.close()
+            # 导入结束后恢复常规的同步级别和缓存大小
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA cache_size={_CACHE_SIZE}')
 
-    def get_journal_sjr(self, journal_name: str, issn: str = '') -> Optional[float]:
+    @staticmethod
+    def _parse_sjr_row(row: Dict, year: int) -> Optional[tuple]:
         """
-        获取期刊的 SJR 分数
+        将 SJR CSV 的一行解析为插入参数
+
+        Returns:
+            参数元组，解析失败返回 None
+        """
+        try:
+            # Map CSV columns to database fields
+            issn = row.get('Issn', '') or ''
+            eissn = row.get('Eissn', '') or ''
+            title = row.get('Title', '') or ''
+            sjr_str = row.get('SJR', '') or '0'
+            sjr_quartile = row.get('SJR Best Quartile', '') or ''
+            h_index_str = row.get('H index', '') or '0'
+            total_docs_str = row.get('Total Docs. (2024)', '') or '0'
+            country = row.get('Country', '') or ''
+            areas = row.get('Areas', '') or ''
+            categories = row.get('Categories', '') or ''
+
+            # Clean SJR value (remove commas, convert to float)
+            sjr = float(sjr_str.replace(',', '').strip()) if sjr_str.strip() else 0.0
+
+            return (
+                issn,
+                eissn,
+                title,
+                sjr,
+                sjr_quartile,
+                int(h_index_str) if h_index_str.isdigit() else 0,
+                int(total_docs_str.replace(',', '').strip()) if total_docs_str.strip() else 0,
+                country,
+                areas,
+                categories,
+                year,
+                _norm(title)
+            )
+        except Exception:
+            return None
+
+    @staticmethod
+    def _parse_sjr_frame(pd, csv_path: Path, year: int) -> tuple:
+        """
+        使用 pandas 按列解析 SJR CSV，规则与 _parse_sjr_row 相同
+
+        Returns:
+            (插入参数元组列表, 跳过的行数)
+        """
+        df = pd.read_csv(
+            csv_path, sep=';', dtype=str,
+            keep_default_na=False, encoding='utf-8'
+        )
+        df = df.reindex(columns=_SJR_CSV_COLUMNS).fillna('')
+
+        # SJR 无法解析、文档数不是整数的行与逐行解析一样跳过
+        sjr_str = df['SJR'].str.replace(',', '', regex=False).str.strip()
+        sjr = pd.to_numeric(sjr_str.mask(sjr_str == '', '0'), errors='coerce')
+
+        docs_str = df['Total Docs. (2024)'].str.replace(',', '', regex=False).str.strip()
+        docs_ok = (docs_str == '') | docs_str.str.fullmatch(r'[+-]?\d+')
+
+        valid = sjr.notna() & docs_ok
+        skipped = int((~valid).sum())
+
+        df = df[valid]
+        h_index_str = df['H index']
+        titles = df['Title'].tolist()
+
+        rows = list(zip(
+            df['Issn'].tolist(),
+            df['Eissn'].tolist(),
+            titles,
+            sjr[valid].astype(float).tolist(),
+            df['SJR Best Quartile'].tolist(),
+            h_index_str.where(h_index_str.str.isdigit(), '0').astype(int).tolist(),
+            docs_str[valid].mask(docs_str[valid] == '', '0').astype(int).tolist(),
+            df['Country'].tolist(),
+            df['Areas'].tolist(),
+            df['Categories'].tolist(),
+            [year] * len(titles),
+            [_norm(title) for title in titles]
+        ))
+
+        return rows, skipped
+
+    def _load_lookup_tables(self):
+        """一次性把期刊表读入内存哈希表（按 ISSN / 规范化标题索引）"""
+        issn_idx = {}
+        title_idx = {}
+
+        cursor = self._conn.execute('''
+            SELECT title_norm, issn, eissn, sjr, sjr_best_quartile FROM journals
+        ''')
+        for title_norm, issn, eissn, sjr, quartile in cursor:
+            metrics = (sjr, quartile)
+            # SJR 导出的 Issn 列形如 "00280836, 14764687"，逐个建立索引
+            for key in _split_issns(issn) + _split_issns(eissn):
+                issn_idx.setdefault(key, metrics)
+            if title_norm:
+                # 同名期刊保留 SJR 最高的一条
+                best = title_idx.get(title_norm)
+                if best is None or (sjr or 0) > (best[0] or 0):
+                    title_idx[title_norm] = metrics
+
+        self._issn_idx = issn_idx
+        self._title_idx = title_idx
+
+    def _lookup_journal(self, journal_name: str, issn: str = '') -> Optional[tuple]:
+        """查找期刊的 (sjr, quartile)，结果按规范化后的参数缓存"""
+        return self._lookup_cache(
+            (journal_name or '').strip().lower(),
+            (issn or '').strip()
+        )
+
+    def _resolve_journal(self, journal_name: str, issn: str) -> Optional[tuple]:
+        """
+        解析期刊的 (sjr, quartile)
+
+        依次尝试 ISSN、规范化标题的精确匹配，最后回退到 FTS5 全文检索，
+        全文检索的结果（包括未命中）写回标题索引供后续复用。
+        """
+        if self._title_idx is None:
+            self._load_lookup_tables()
+
+        for key in _split_issns(issn):
+            metrics = self._issn_idx.get(key)
+            if metrics is not None:
+                return metrics
+
+        key = _norm(journal_name)
+        if not key:
+            return None
+        if key in self._title_idx:
+            return self._title_idx[key]
+
+        metrics = None
+        if self._fts:
+            # 每个词加引号，避免被当作 FTS 运算符
+            query = ' '.join(f'"{token}"' for token in key.split())
+            metrics = self._conn.execute('''
+                SELECT sjr, sjr_best_quartile FROM journals
+                WHERE rowid = (
+                    SELECT rowid FROM journals_fts
+                    WHERE journals_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT 1
+                )
+            ''', (query,)).fetchone()
+
+        self._title_idx[key] = metrics
+        return metrics
+
+    def get_journal_metrics(self, journal_name: str, issn: str = '') -> Tuple[Optional[float], str]:
+        """
+        一次查询同时获取期刊的 SJR 分数和四分位数
 
         Args:
             journal_name: 期刊名称
             issn: 可选的 ISSN（更精确的匹配）
 
         Returns:
-            SJR 分数，如果未找到返回 None
+            (SJR 分数或 None, 'Q1'..'Q4' 或 'Unknown')
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        metrics = self._lookup_journal(journal_name, issn)
 
-        # 优先使用 ISSN 查询
-        if issn:
-            cursor.execute('''
-                SELECT sjr FROM journals
-                WHERE issn = ? OR eissn = ?
-            ''', (issn, issn))
-
-            result = cursor.fetchone()
-            if result and result[0]:
-                conn.close()
-                return result[0]
+        if not metrics:
+            return None, 'Unknown'
 
-        # 使用期刊名称模糊匹配
-        cursor.execute('''
-            SELECT sjr FROM journals
-            WHERE title LIKE ?
-            ORDER BY sjr DESC
-            LIMIT 1
-        ''', (f'%{journal_name}%',))
+        return metrics[0] or None, metrics[1] or 'Unknown'
 
-        result = cursor.fetchone()
-        conn.close()
+    def get_journal_sjr(self, journal_name: str, issn: str = '') -> Optional[float]:
+        """
+        获取期刊的 SJR 分数
 
-        if result and result[0]:
-            return result[0]
+        Args:
+            journal_name: 期刊名称
+            issn: 可选的 ISSN（更精确的匹配）
 
-        return None
+        Returns:
+            SJR 分数，如果未找到返回 None
+        """
+        return self.get_journal_metrics(journal_name, issn)[0]
 
     def get_journal_quartile(self, journal_name: str, issn: str = '') -> str:
         """
@@ -186,28 +455,7 @@ class ImpactFactorFilter:
         Returns:
             'Q1', 'Q2', 'Q3', 'Q4', 或 'Unknown'
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        if issn:
-            cursor.execute('''
-                SELECT sjr_best_quartile FROM journals
-                WHERE issn = ? OR eissn = ?
-            ''', (issn, issn))
-        else:
-            cursor.execute('''
-                SELECT sjr_best_quartile FROM journals
-                WHERE title LIKE ?
-                LIMIT 1
-            ''', (f'%{journal_name}%',))
-
-        result = cursor.fetchone()
-        conn.close()
-
-        if result and result[0]:
-            return result[0]
-
-        return 'Unknown'
+        return self.get_journal_metrics(journal_name, issn)[1]
 
     def filter_papers_by_sjr(
         self,
@@ -222,42 +470,39 @@ class ImpactFactorFilter:
             min_sjr: 最小 SJR 分数
 
         Returns:
-            筛选后的论文列表（带有 SJR 信息）
+            筛选后的论文列表（带有 SJR 信息）；
+            结果的统计摘要同时保存在 self.last_summary
         """
-        filtered = []
-        with_sjr = 0
-        without_sjr = 0
-
-        for paper in papers:
-            # 获取期刊信息
-            publication = paper.get('publication', {})
-            journal_name = publication.get('title', '')
-            issn = publication.get('issn', '')
-
-            # 查找 SJR
-            sjr_score = self.get_journal_sjr(journal_name, issn)
-            quartile = self.get_journal_quartile(journal_name, issn)
-
-            # 添加到论文数据
+        # 按列提取期刊字段（SoA），每个不重复的期刊只解析一次
+        publications = [paper.get('publication') or {} for paper in papers]
+        keys = list(zip(
+            [pub.get('title', '') for pub in publications],
+            [pub.get('issn', '') for pub in publications]
+        ))
+
+        resolved = {key: self.get_journal_metrics(*key) for key in set(keys)}
+        sjr_scores = [resolved[key][0] for key in keys]
+        quartiles = [resolved[key][1] for key in keys]
+
+        # 保留达到阈值的论文，以及没有 SJR 数据的论文
+        keep = [score is None or score >= min_sjr for score in sjr_scores]
+        without_sjr = sjr_scores.count(None)
+        with_sjr = len(sjr_scores) - without_sjr
+
+        # 将结果写回论文数据
+        for paper, sjr_score, quartile in zip(papers, sjr_scores, quartiles):
             paper['sjr_score'] = sjr_score
             paper['sjr_quartile'] = quartile
 
-            if sjr_score is not None:
-                with_sjr += 1
-
-                # 筛选
-                if sjr_score >= min_sjr:
-                    filtered.append(paper)
-            else:
-                without_sjr += 1
-                # 保留没有 SJR 数据的论文
-                filtered.append(paper)
+        filtered = [paper for paper, kept in zip(papers, keep) if kept]
 
         print(f"[OK] SJR filter complete (min: {min_sjr}):")
         print(f"  With SJR data: {with_sjr} papers")
         print(f"  Without SJR data: {without_sjr} papers")
         print(f"  Final count: {len(filtered)} papers")
 
+        self.last_summary = self.get_sjr_summary(filtered)
+
         return filtered
 
     def get_sjr_summary(self, papers: List[Dict]) -> Dict:
@@ -304,8 +549,7 @@ class ImpactFactorFilter:
         Returns:
             期刊列表
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
 
         if area:
             cursor.execute('''
@@ -324,7 +568,6 @@ class ImpactFactorFilter:
             ''', (limit,))
 
         rows = cursor.fetchall()
-        conn.close()
 
         return [
             {
@@ -348,11 +591,7 @@ def test_filter():
     filter_engine = ImpactFactorFilter()
 
     # 检查数据库状态
-    conn = sqlite3.connect(filter_engine.db_path)
-    cursor = conn.cursor()
-    cursor.execute('SELECT COUNT(*) FROM journals')
-    count = cursor.fetchone()[0]
-    conn.close()
+    count = filter_engine.get_conn().execute('SELECT COUNT(*) FROM journals').fetchone()[0]
 
     print(f"\n数据库状态:")
     print(f"  路径: {filter_engine.db_path}")
@@ -5,11 +5,265 @@ PDF 下载管理器
 多策略下载：PMC → Unpaywall → 直接链接 → 机构认证
 """
 
+import os
+import sys
+import json
 import time
+import queue
+import shutil
+import logging
+import threading
 import requests
+from contextlib import contextmanager
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional, Dict
 from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+# 解析 API 响应：优先使用 orjson（直接接受 bytes），否则回退到标准库
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+
+DEFAULT_USER_AGENT = "Paper-Search-Assistant/1.0"
+
+logger = logging.getLogger('pdf_downloader')
+
+
+class _FallbackConsoleHandler(logging.StreamHandler):
+    """宿主未配置日志时把下载日志写到 stderr；根 logger 配置了处理器后自动让位"""
+
+    def emit(self, record):
+        if not logging.getLogger().handlers:
+            super().emit(record)
+
+
+# 仅当宿主没有配置任何日志时，才挂上兜底的控制台输出（INFO），
+# 使直接使用 PDFDownloadManager 时也能看到成功/来源信息；
+# 否则日志照常传播给宿主的处理器，或由调用方使用 log_to_console()
+_console_handler = None
+if not logger.handlers and not logging.getLogger().handlers:
+    _console_handler = _FallbackConsoleHandler()
+    _console_handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_console_handler)
+    if logger.level == logging.NOTSET:
+        logger.setLevel(logging.INFO)
+
+# 流式写盘的块大小（1 MiB）
+_COPY_BUFSIZE = 1 << 20
+
+# 检查 PDF 文件头时读取的字节数
+_PDF_HEAD_BYTES = 1024
+
+
+class _SafeFilenameTable(dict):
+    """str.translate 用的字符表：保留字母数字与 ' -_'，其余删除（按需填充）"""
+
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        value = codepoint if char.isalnum() or char in ' -_' else None
+        self[codepoint] = value
+        return value
+
+
+_SAFE_FILENAME_TABLE = _SafeFilenameTable()
+_DOI_FILENAME_TABLE = str.maketrans({'/': '_', '.': '_'})
+
+# 元数据查询的磁盘缓存（需要 requests-cache），跨多次检索复用
+_HTTP_CACHE_PATH = Path(__file__).parent.parent / "cache" / "http_cache.sqlite"
+_METADATA_CACHE_SECONDS = 7 * 86400
+
+# 开放获取比例很低的订阅出版商 DOI 前缀：有 PMID 时先试 PMC，再查 Unpaywall
+_CLOSED_DOI_PREFIXES = frozenset({
+    '10.1016',  # Elsevier
+    '10.1053',  # Elsevier (W.B. Saunders)
+    '10.1067',  # Elsevier (Mosby)
+    '10.1002',  # Wiley
+    '10.1111',  # Wiley-Blackwell
+    '10.1007',  # Springer
+    '10.1080',  # Taylor & Francis
+    '10.1177',  # SAGE
+    '10.1097',  # Wolters Kluwer / LWW
+    '10.1021',  # ACS
+    '10.1055',  # Thieme
+})
+
+# 只缓存 Unpaywall 与 PMC ID Converter 的响应；PDF 本体不缓存
+_METADATA_CACHE_URLS = {
+    'api.unpaywall.org/v2': _METADATA_CACHE_SECONDS,
+    'www.ncbi.nlm.nih.gov/pmc/utils/id/convert': _METADATA_CACHE_SECONDS,
+}
+
+
+@contextmanager
+def log_to_console(stream=None):
+    """
+    在上下文内把下载日志输出到控制台（默认 stderr）
+
+    下载线程只把日志记录放入队列，由一个后台线程统一格式化和写出，
+    避免多个下载线程争用 stdout 锁。
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = QueueListener(log_queue, handler)
+    queue_handler = QueueHandler(log_queue)
+
+    # 上下文内暂时摘下兜底处理器，避免同一条日志输出两次
+    previous_level, previous_propagate = logger.level, logger.propagate
+    fallback_attached = _console_handler is not None and _console_handler in logger.handlers
+    if fallback_attached:
+        logger.removeHandler(_console_handler)
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener.start()
+    try:
+        yield
+    finally:
+        listener.stop()
+        logger.removeHandler(queue_handler)
+        if fallback_attached:
+            logger.addHandler(_console_handler)
+        logger.level, logger.propagate = previous_level, previous_propagate
+
+
+def get_shared_session(user_agent: str = DEFAULT_USER_AGENT) -> requests.Session:
+    """
+    获取进程内共享的 HTTP 会话（按 User-Agent 复用）
+
+    挂载较大的连接池，使 Unpaywall / NCBI / 出版商主机的
+    TCP+TLS 连接在多次请求和多个下载线程之间复用。
+    安装了 requests-cache 时，Unpaywall / ID Converter 的响应
+    （包括“无开放获取版本”这类否定结果）缓存 7 天，过期后按 ETag 条件请求。
+    """
+    return _session_for(user_agent)
+
+
+@lru_cache(maxsize=None)
+def _session_for(user_agent: str) -> requests.Session:
+    if requests_cache is not None:
+        _HTTP_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        session = requests_cache.CachedSession(
+            str(_HTTP_CACHE_PATH),
+            backend='sqlite',
+            expire_after=requests_cache.DO_NOT_CACHE,
+            urls_expire_after=_METADATA_CACHE_URLS,
+            allowable_methods=['GET']
+        )
+    else:
+        session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"]
+        )
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'User-Agent': user_agent})
+    return session
+
+
+class _TokenBucket:
+    """
+    线程安全的令牌桶限速器
+
+    默认容量为 1（不允许突发），请求按 1/rate 秒的间隔放行，
+    任意 1 秒窗口内不超过 rate 次。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """
+        Args:
+            rate: 每秒补充的令牌数（即最大请求速率）
+            capacity: 桶容量（可突发的请求数，默认 1）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取得一个令牌，必要时等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+def get_ncbi_limiter(api_key: Optional[str] = None) -> _TokenBucket:
+    """
+    获取进程内共享的 NCBI 限速器
+
+    PubMed 搜索与 PDF 下载线程（ID Converter / PMC）共用同一个令牌桶，
+    合计不超过 NCBI 配额：有 API Key 为 10 请求/秒，否则 3 请求/秒。
+    """
+    return _ncbi_limiter_for(10 if api_key else 3)
+
+
+@lru_cache(maxsize=None)
+def _ncbi_limiter_for(rate: int) -> _TokenBucket:
+    return _TokenBucket(rate)
+
+
+def _stream_to_file(response: requests.Response, filepath: Path) -> bool:
+    """
+    将流式响应体写入文件（在 C 层按 1 MiB 块复制，自动解压 gzip/deflate）
+
+    先检查响应开头的 %PDF 标记，付费墙/跳转页等 HTML 不会被保存。
+    内容先写入 .part 临时文件，完成后原子替换，中断时不会留下半个 PDF。
+
+    Returns:
+        True 如果内容是 PDF 并已写入
+    """
+    response.raw.decode_content = True
+
+    # PDF 规范允许 %PDF 标记出现在前 1024 字节内
+    head = response.raw.read(_PDF_HEAD_BYTES)
+    if b'%PDF' not in head:
+        response.close()
+        return False
+
+    part_path = filepath.with_name(filepath.name + '.part')
+    try:
+        with open(part_path, 'wb', buffering=_COPY_BUFSIZE) as f:
+            f.write(head)
+            shutil.copyfileobj(response.raw, f, length=_COPY_BUFSIZE)
+        os.replace(part_path, filepath)
+    finally:
+        if part_path.exists():
+            part_path.unlink()
+
+    return True
 
 
 class PDFDownloadManager:
@@ -18,9 +272,10 @@ class PDFDownloadManager:
     def __init__(
         self,
         output_dir: Path,
-        user_agent: str = "Paper-Search-Assistant/1.0",
+        user_agent: str = DEFAULT_USER_AGENT,
         timeout: int = 30,
-        email: Optional[str] = None
+        email: Optional[str] = None,
+        ncbi_api_key: Optional[str] = None
     ):
         """
         初始化下载管理器
@@ -30,21 +285,23 @@ class PDFDownloadManager:
             user_agent: HTTP User-Agent 头
             timeout: 请求超时时间（秒）
             email: Email address for Unpaywall API (required)
+            ncbi_api_key: NCBI API Key（决定 NCBI 请求的共享限速配额）
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.user_agent = user_agent
         self.timeout = timeout
         self.email = email or "paper-search@example.com"
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': user_agent})
+        self.session = get_shared_session(user_agent)
+        self._ncbi_limiter = get_ncbi_limiter(ncbi_api_key)
 
     def download_paper_pdf(
         self,
         paper: Dict,
         pmid: Optional[str] = None,
         doi: Optional[str] = None,
-        institution_credentials: Optional[Dict] = None
+        institution_credentials: Optional[Dict] = None,
+        pmcid: Optional[str] = None
     ) -> Dict:
         """
         使用多策略下载 PDF
@@ -55,11 +312,15 @@ class PDFDownloadManager:
         3. 直接 PDF 链接
         4. 机构认证（如果提供）
 
+        DOI 属于开放获取比例很低的出版商且有 PMID 时，1 和 2 对调，
+        PMC 命中即可省去一次 Unpaywall 请求。
+
         Args:
             paper: 论文元数据字典
             pmid: PubMed ID
             doi: DOI
             institution_credentials: 机构认证凭据（可选）
+            pmcid: 预先查询到的 PMCID（'' 表示确认不在 PMC，None 表示未知）
 
         Returns:
             下载结果字典
@@ -71,6 +332,23 @@ class PDFDownloadManager:
             'error': None
         }
 
+        # 按 DOI / PMID 命名的文件已存在（如 --resume）时不再发起请求
+        if paper.get('doi') or paper.get('pmid'):
+            existing = self.output_dir / self._generate_filename(paper, '', '')
+            if existing.exists():
+                return {
+                    'success': True,
+                    'source': 'Existing',
+                    'path': str(existing)
+                }
+
+        pmc_first = bool(pmid and doi and doi.split('/', 1)[0] in _CLOSED_DOI_PREFIXES)
+
+        if pmc_first:
+            result = self._download_from_pmc(pmid, paper, pmcid)
+            if result['success']:
+                return result
+
         # 策略 1: Unpaywall API（优先 - 比 PMC 覆盖更广）
         if doi:
             result = self._download_from_unpaywall(doi, paper)
@@ -78,8 +356,8 @@ class PDFDownloadManager:
                 return result
 
         # 策略 2: PubMed Central (PMC)
-        if pmid:
-            result = self._download_from_pmc(pmid, paper)
+        if pmid and not pmc_first:
+            result = self._download_from_pmc(pmid, paper, pmcid)
             if result['success']:
                 return result
 
@@ -98,10 +376,11 @@ class PDFDownloadManager:
         result['error'] = "无开放获取 PDF 可用（可能需要订阅）"
         return result
 
-    def _download_from_pmc(self, pmid: str, paper: Dict) -> Dict:
+    def _download_from_pmc(self, pmid: str, paper: Dict, pmcid: Optional[str] = None) -> Dict:
         """从 PubMed Central 下载 PDF"""
-        # 获取 PMCID
-        pmcid = self._get_pmcid(pmid)
+        # 获取 PMCID（未预先查询时才请求 ID Converter）
+        if pmcid is None:
+            pmcid = self._get_pmcid(pmid)
         if not pmcid:
             # 论文不在 PMC 中 - 这是正常的，不显示错误
             return {
@@ -117,6 +396,7 @@ class PDFDownloadManager:
             filename = self._generate_filename(paper, 'pmc', pmid)
             filepath = self.output_dir / filename
 
+            self._ncbi_limiter.acquire()
             response = self.session.get(pdf_url, stream=True, timeout=self.timeout)
             response.raise_for_status()
 
@@ -130,11 +410,14 @@ class PDFDownloadManager:
                 }
 
             # 保存 PDF
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            if not _stream_to_file(response, filepath):
+                return {
+                    'success': False,
+                    'source': 'PMC',
+                    'error': 'Non-PDF content'
+                }
 
-            print(f"  ✓ PMC 下载成功: {filename}")
+            logger.info("  ✓ PMC 下载成功: %s", filename)
             return {
                 'success': True,
                 'source': 'PMC',
@@ -158,9 +441,10 @@ class PDFDownloadManager:
         }
 
         try:
+            self._ncbi_limiter.acquire()
             response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
 
             records = data.get('records', [])
             if records:
@@ -186,7 +470,7 @@ class PDFDownloadManager:
         try:
             response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
 
             # 检查是否有开放获取 PDF
             if data.get('is_oa') and data.get('best_oa_location'):
@@ -215,11 +499,14 @@ class PDFDownloadManager:
                         }
 
                     # 保存
-                    with open(filepath, 'wb') as f:
-                        for chunk in pdf_response.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                    if not _stream_to_file(pdf_response, filepath):
+                        return {
+                            'success': False,
+                            'source': 'Unpaywall',
+                            'error': 'Non-PDF content'
+                        }
 
-                    print(f"  ✓ Unpaywall 下载成功: {filename}")
+                    logger.info("  ✓ Unpaywall 下载成功: %s", filename)
                     return {
                         'success': True,
                         'source': 'Unpaywall',
@@ -255,11 +542,10 @@ class PDFDownloadManager:
                     if 'pdf' in content_type.lower() or url.endswith('.pdf'):
                         response.raise_for_status()
 
-                        with open(filepath, 'wb') as f:
-                            for chunk in response.iter_content(chunk_size=8192):
-                                f.write(chunk)
+                        if not _stream_to_file(response, filepath):
+                            continue
 
-                        print(f"  ✓ 直接链接下载成功: {filename}")
+                        logger.info("  ✓ 直接链接下载成功: %s", filename)
                         return {
                             'success': True,
                             'source': 'Direct',
@@ -317,11 +603,14 @@ class PDFDownloadManager:
                     filename = self._generate_filename(paper, 'institution', '')
                     filepath = self.output_dir / filename
 
-                    with open(filepath, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                    if not _stream_to_file(response, filepath):
+                        return {
+                            'success': False,
+                            'source': 'Institution',
+                            'error': 'Non-PDF content'
+                        }
 
-                    print(f"  ✓ 机构下载成功: {filename}")
+                    logger.info("  ✓ 机构下载成功: %s", filename)
                     return {
                         'success': True,
                         'source': 'Institution',
@@ -349,7 +638,7 @@ class PDFDownloadManager:
 
         if doi:
             # 使用 DOI
-            safe_doi = doi.replace('/', '_').replace('.', '_')
+            safe_doi = doi.translate(_DOI_FILENAME_TABLE)
             return f"{safe_doi}.pdf"
         elif pmid:
             return f"PMID_{pmid}.pdf"
@@ -357,10 +646,7 @@ class PDFDownloadManager:
             return f"{source}_{id_str}.pdf"
         else:
             # 使用标题
-            safe_title = "".join(
-                c for c in title[:50]
-                if c.isalnum() or c in (' ', '-', '_')
-            ).strip()
+            safe_title = title[:50].translate(_SAFE_FILENAME_TABLE).strip()
             return f"{safe_title}.pdf"
 
 
@@ -374,7 +660,7 @@ def test_downloader():
     import tempfile
 
     # 创建临时输出目录
-    with tempfile.TemporaryDirectory() as tmpdir:
+    with tempfile.TemporaryDirectory() as tmpdir, log_to_console(sys.stdout):
         downloader = PDFDownloadManager(output_dir=Path(tmpdir))
 
         # 测试论文（已知有 PMC 的文章）
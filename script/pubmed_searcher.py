@@ -6,11 +6,44 @@ PubMed 搜索模块
 """
 
 import re
-import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Optional
 from datetime import datetime
 
+try:
+    from script.pdf_downloader import get_ncbi_limiter, get_shared_session, json_loads
+except ImportError:
+    # 作为脚本直接运行时 script/ 目录本身在 sys.path 中
+    from pdf_downloader import get_ncbi_limiter, get_shared_session, json_loads
+
+
+# NCBI ID Converter 单次请求允许的最大 ID 数
+_IDCONV_BATCH_SIZE = 200
+_IDCONV_MAX_WORKERS = 4
+
+# findpapers 查询语法：["phrase search"] 与 [single word]
+_PHRASE_RE = re.compile(r'\["([^"]+)"\]')
+_WORD_RE = re.compile(r'\[([^\]]+)\]')
+
+
+# pymed 文章属性到论文字典的直接映射：(属性, 是否属于 publication, 字段)
+_ARTICLE_FIELDS = (
+    ('title', False, 'title'),
+    ('abstract', False, 'abstract'),
+    ('keywords', False, 'keywords'),
+    ('journal', True, 'title'),
+    ('volume', True, 'volume'),
+    ('issue', True, 'issue'),
+    ('issn', True, 'issn'),
+)
+
+@lru_cache(maxsize=256)
+def _convert_cached(query: str) -> str:
+    """findpapers → PubMed 查询转换（重复查询直接命中缓存）"""
+    # 先替换 ["phrase"] -> "phrase"[All Fields]，再替换 [word] -> word[All Fields]
+    return _WORD_RE.sub(r'\1[All Fields]', _PHRASE_RE.sub(r'"\1"[All Fields]', query))
+
 
 class PubMedSearcher:
     """PubMed 搜索器 - 使用 pymed 库"""
@@ -26,9 +59,11 @@ class PubMedSearcher:
         self.email = email
         self.api_key = api_key
 
-        # 速率限制：有 API Key 为 10 请求/秒，否则 3 请求/秒
-        self.min_interval = 0.1 if api_key else 0.34
-        self.last_request_time = 0
+        # 速率限制：有 API Key 为 10 请求/秒，否则 3 请求/秒（与 PDF 下载器共用同一配额）
+        self._limiter = get_ncbi_limiter(api_key)
+
+        # 与 PDF 下载器共用连接池
+        self.session = get_shared_session()
 
         try:
             from pymed import PubMed
@@ -44,14 +79,8 @@ class PubMedSearcher:
             )
 
     def _rate_limit_wait(self):
-        """速率限制等待"""
-        now = time.time()
-        elapsed = now - self.last_request_time
-
-        if elapsed < self.min_interval:
-            time.sleep(self.min_interval - elapsed)
-
-        self.last_request_time = time.time()
+        """速率限制等待（共享令牌桶，按 NCBI 配额的间隔放行）"""
+        self._limiter.acquire()
 
     def search(
         self,
@@ -95,27 +124,27 @@ class PubMedSearcher:
             print(f"搜索失败: {e}")
             return []
 
-        # 处理结果
+        # 处理结果（逐篇只做本地解析，不再发起网络请求）
         papers = []
         for article in results:
-            self._rate_limit_wait()
-
             try:
                 paper_data = self._parse_article(article)
                 if paper_data:
-                    # 检查 PMC 可用性
-                    pmid = paper_data.get('pmid', '')
-                    if pmid:
-                        paper_data['has_pmc'] = self._check_pmc_availability(pmid)
-                    else:
-                        paper_data['has_pmc'] = False
-
                     papers.append(paper_data)
 
             except Exception as e:
                 print(f"解析文章失败: {e}")
                 continue
 
+        # 批量检查 PMC 可用性
+        pmcids = self._bulk_pmc_lookup([p['pmid'] for p in papers if p.get('pmid')])
+        for paper_data in papers:
+            pmid = paper_data.get('pmid', '')
+            if pmid in pmcids:
+                # 查询成功：'' 表示确认不在 PMC 中，下载时可跳过 PMC
+                paper_data['pmcid'] = pmcids[pmid] or ''
+            paper_data['has_pmc'] = bool(pmcids.get(pmid))
+
         print(f"找到 {len(papers)} 篇论文")
         return papers
 
@@ -133,15 +162,7 @@ class PubMedSearcher:
         Returns:
             PubMed Entrez 格式查询
         """
-        result = query
-
-        # 替换 ["phrase search"] -> "phrase"[All Fields]
-        result = re.sub(r'\["([^"]+)"\]', r'"\1"[All Fields]', result)
-
-        # 替换 [single word] -> word[All Fields]
-        result = re.sub(r'\[([^\]]+)\]', r'\1[All Fields]', result)
-
-        return result
+        return _convert_cached(query)
 
     def _parse_article(self, article) -> Dict:
         """
@@ -173,66 +194,47 @@ class PubMedSearcher:
             'pmid': ''
         }
 
-        # 标题
-        if hasattr(article, 'title') and article.title:
-            paper['title'] = article.title
+        # 直接拷贝的字段
+        publication = paper['publication']
+        for attr, section, key in _ARTICLE_FIELDS:
+            value = getattr(article, attr, None)
+            if value:
+                (publication if section else paper)[key] = value
 
         # 作者
-        if hasattr(article, 'authors') and article.authors:
-            authors = []
-            for author in article.authors:
+        authors = getattr(article, 'authors', None)
+        if authors:
+            names = []
+            for author in authors:
                 if hasattr(author, 'lastname') and hasattr(author, 'firstname'):
-                    name = f"{author.firstname} {author.lastname}"
-                    authors.append(name)
+                    names.append(f"{author.firstname} {author.lastname}")
                 elif hasattr(author, 'lastname'):
-                    authors.append(author.lastname)
-            paper['authors'] = authors
-
-        # 摘要
-        if hasattr(article, 'abstract') and article.abstract:
-            paper['abstract'] = article.abstract
+                    names.append(author.lastname)
+            paper['authors'] = names
 
         # 发表日期
-        if hasattr(article, 'publication_date') and article.publication_date:
+        publication_date = getattr(article, 'publication_date', None)
+        if publication_date:
             try:
                 # pymed 返回的是 datetime 对象
-                if isinstance(article.publication_date, datetime):
-                    paper['publication_date'] = article.publication_date.strftime('%Y-%m-%d')
+                if isinstance(publication_date, datetime):
+                    paper['publication_date'] = publication_date.strftime('%Y-%m-%d')
                 else:
-                    paper['publication_date'] = str(article.publication_date)
+                    paper['publication_date'] = str(publication_date)
             except Exception:
                 paper['publication_date'] = ''
 
         # DOI
-        if hasattr(article, 'doi') and article.doi:
-            paper['doi'] = article.doi
-            paper['urls'].append(f"https://doi.org/{article.doi}")
-
-        # 关键词
-        if hasattr(article, 'keywords') and article.keywords:
-            paper['keywords'] = article.keywords
-
-        # 期刊信息
-        if hasattr(article, 'journal') and article.journal:
-            paper['publication']['title'] = article.journal
-
-        if hasattr(article, 'volume') and article.volume:
-            paper['publication']['volume'] = article.volume
-
-        if hasattr(article, 'issue') and article.issue:
-            paper['publication']['issue'] = article.issue
-
-        # ISSN
-        if hasattr(article, 'issn') and article.issn:
-            paper['publication']['issn'] = article.issn
+        doi = getattr(article, 'doi', None)
+        if doi:
+            paper['doi'] = doi
+            paper['urls'].append(f"https://doi.org/{doi}")
 
         # PubMed ID
-        if hasattr(article, 'pubmed_id') and article.pubmed_id:
-            paper['pmid'] = str(article.pubmed_id)
-            paper['urls'].append(f"https://pubmed.ncbi.nlm.nih.gov/{article.pubmed_id}/")
-
-        # 确保 URLs 去重
-        paper['urls'] = list(dict.fromkeys(paper['urls']))
+        pubmed_id = getattr(article, 'pubmed_id', None)
+        if pubmed_id:
+            paper['pmid'] = str(pubmed_id)
+            paper['urls'].append(f"https://pubmed.ncbi.nlm.nih.gov/{pubmed_id}/")
 
         return paper
 
@@ -246,27 +248,67 @@ class PubMedSearcher:
         Returns:
             True 如果有 PMC 全文可用
         """
+        return bool(self._bulk_pmc_lookup([pmid]).get(pmid))
+
+    def _bulk_pmc_lookup(self, pmids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        批量将 PMID 转换为 PMCID（ID Converter 每次最多 200 个）
+
+        Args:
+            pmids: PubMed ID 列表
+
+        Returns:
+            {pmid: pmcid 或 None}；请求失败的批次不包含在结果中
+        """
+        batches = [
+            pmids[start:start + _IDCONV_BATCH_SIZE]
+            for start in range(0, len(pmids), _IDCONV_BATCH_SIZE)
+        ]
+
+        pmc_map = {}
+        if len(batches) <= 1:
+            for batch in batches:
+                pmc_map.update(self._pmc_lookup_batch(batch))
+            return pmc_map
+
+        # 多个批次并发请求，令牌桶保证整体不超过 NCBI 配额
+        workers = min(_IDCONV_MAX_WORKERS, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for batch_map in executor.map(self._pmc_lookup_batch, batches):
+                pmc_map.update(batch_map)
+
+        return pmc_map
+
+    def _pmc_lookup_batch(self, batch: List[str]) -> Dict[str, Optional[str]]:
+        """
+        请求一个批次的 ID Converter
+
+        Returns:
+            {pmid: pmcid 或 None}；请求失败时返回空字典
+        """
         url = "https://www.ncbi.nlm.nih.gov/pmc/utils/id/convert/v3.0/"
         params = {
-            'ids': pmid,
+            'ids': ','.join(batch),
             'format': 'json'
         }
 
+        self._rate_limit_wait()
+
         try:
-            response = requests.get(url, params=params, timeout=5)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
-
-            # 检查是否有 PMCID
-            records = data.get('records', [])
-            if records and 'pmcid' in records[0]:
-                return True
-
+            data = json_loads(response.content)
         except Exception:
-            # 静默失败 - 大多数论文没有 PMC 版本是正常的
-            pass
+            # 静默失败 - 该批次视为 PMC 状态未知
+            return {}
+
+        batch_map = dict.fromkeys(batch)
+        for record in data.get('records', []):
+            pmid = str(record.get('pmid') or record.get('requested-id') or '')
+            if pmid in batch_map:
+                batch_map[pmid] = record.get('pmcid')
 
-        return False
+        return batch_map
 
 
 def test_search():
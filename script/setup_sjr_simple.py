@@ -51,40 +51,6 @@ def show_instructions():
 show_download_instructions = show_instructions
 
 
-def import_data(csv_path: str, year: int = 2024):
-    """Display download instructions"""
-    print("\n" + "=" * 60)
-    print("How to Download SJR Data")
-    print("=" * 60)
-
-    print("\nStep 1: Visit Scimago Website")
-    print("  Open: https://www.scimagojr.com/")
-
-    print("\nStep 2: Navigate to Journal Rankings")
-    print("  Click 'Journal Rankings' button")
-
-    print("\nStep 3: Configure Filters (Recommended)")
-    print("  - Year: Select latest year (e.g., 2024)")
-    print("  - Areas: Select relevant areas (or 'All Areas')")
-    print("    Common options:")
-    print("      * Medicine")
-    print("      * Computer Science")
-    print("      * Engineering")
-    print("      * Neuroscience")
-    print("      * Or select 'All Areas' for everything")
-
-    print("\nStep 4: Export Data")
-    print("  - Click 'Export' button")
-    print("  - Select 'CSV' format")
-    print("  - Wait for download to complete")
-
-    print("\nStep 5: Save File")
-    print(f"  Save to: {PROJECT_ROOT}/cache/sjr_2024.csv")
-    print("  Or anywhere else, just specify the path when importing")
-
-    print("\n" + "=" * 60)
-
-
 def import_data(csv_path: str, year: int = 2024):
     """Import SJR data from CSV file"""
     from script.impact_filter import ImpactFactorFilter
@@ -104,16 +70,13 @@ def import_data(csv_path: str, year: int = 2024):
     print("This may take a few minutes for large files...\n")
 
     try:
-        filter_engine = ImpactFactorFilter()
-        filter_engine.import_sjr_csv(csv_file, year)
+        with ImpactFactorFilter() as filter_engine:
+            filter_engine.import_sjr_csv(csv_file, year)
 
-        # Verify import
-        import sqlite3
-        conn = sqlite3.connect(filter_engine.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM journals WHERE year = ?', (year,))
-        count = cursor.fetchone()[0]
-        conn.close()
+            # Verify import on the filter's warm connection
+            count = filter_engine.get_conn().execute(
+                'SELECT COUNT(*) FROM journals WHERE year = ?', (year,)
+            ).fetchone()[0]
 
         if count > 0:
             print(f"\n[SUCCESS] Imported {count} journals")
@@ -135,24 +98,19 @@ def check_status():
     """Check current database status"""
     from script.impact_filter import ImpactFactorFilter
 
-    filter_engine = ImpactFactorFilter()
-
-    import sqlite3
-    conn = sqlite3.connect(filter_engine.db_path)
-    cursor = conn.cursor()
-    cursor.execute('SELECT COUNT(*) FROM journals')
-    count = cursor.fetchone()[0]
+    # One scan gives both the per-year breakdown and the total
+    with ImpactFactorFilter() as filter_engine:
+        rows = filter_engine.get_conn().execute(
+            'SELECT year, COUNT(*) FROM journals GROUP BY year ORDER BY year DESC'
+        ).fetchall()
+    years = [row[0] for row in rows]
+    count = sum(row[1] for row in rows)
 
     if count > 0:
-        cursor.execute('SELECT year FROM journals GROUP BY year ORDER BY year DESC')
-        years = [row[0] for row in cursor.fetchall()]
-        conn.close()
-
         print(f"\n[OK] Database contains {count} journals")
         print(f"  Years: {', '.join(map(str, years))}")
         return True
     else:
-        conn.close()
         print("\n[INFO] Database is empty")
         return False
 